@@ -0,0 +1,246 @@
+#
+# Part of p5: A Python package based on Processing
+# Copyright (C) 2017-2019 Abhik Pal
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Ear clipping triangulation of simple polygons.
+
+The triangulation runs as a compiled numba kernel (numba is installed
+with the optional ``p5[numba]`` extra). When numba isn't installed,
+`earcut` doesn't triangulate anything and the renderer
+keeps using the GLU tessellator, and `vertex_turns` falls back to
+numpy.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, see `earcut`
+    njit = None
+
+
+def earcut(vx, vy):
+    """Triangulate a simple polygon (without holes) by ear clipping.
+
+    :param vx: x-coordinates of the polygon vertices
+    :type vx: np.ndarray
+
+    :param vy: y-coordinates of the polygon vertices
+    :type vy: np.ndarray
+
+    :returns: (m, 3) array of triangle indices into the given vertices
+        or None if the polygon couldn't be triangulated (it isn't
+        simple, is degenerate, or numba isn't available).
+    :rtype: np.ndarray | None
+    """
+    if njit is None:
+        return None
+
+    # Drop repeated consecutive vertices (like the closing vertex of a
+    # shape drawn with `CLOSE`), they only get in the way of the ears.
+    keep = (vx != np.roll(vx, 1)) | (vy != np.roll(vy, 1))
+    idx = np.flatnonzero(keep).astype(np.uint32)
+    if len(idx) < 3:
+        return None
+
+    faces = _earcut(np.ascontiguousarray(vx[idx]),
+                    np.ascontiguousarray(vy[idx]))
+    if len(faces) != len(idx) - 2:
+        return None
+    return idx[faces]
+
+
+def vertex_turns(vx, vy):
+    """Compute the cross product of the two polygon edges meeting at
+    every vertex. Its sign gives the direction the polygon turns in at
+    that vertex (positive for counter-clockwise turns).
+
+    :param vx: x-coordinates of the polygon vertices
+    :type vx: np.ndarray
+
+    :param vy: y-coordinates of the polygon vertices
+    :type vy: np.ndarray
+
+    :rtype: np.ndarray
+    """
+    if njit is not None:
+        return _vertex_turns(vx, vy)
+
+    ax = vx - np.roll(vx, 1)
+    ay = vy - np.roll(vy, 1)
+    bx = np.roll(vx, -1) - vx
+    by = np.roll(vy, -1) - vy
+    return ax * by - ay * bx
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _vertex_turns(vx, vy):
+        n = len(vx)
+        out = np.empty(n, np.float64)
+        for i in range(n):
+            a = (i + n - 1) % n
+            c = (i + 1) % n
+            out[i] = ((vx[i] - vx[a]) * (vy[c] - vy[i]) -
+                      (vy[i] - vy[a]) * (vx[c] - vx[i]))
+        return out
+
+    @njit(cache=True)
+    def _orientation(ax, ay, bx, by, cx, cy):
+        return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+    @njit(cache=True)
+    def _on_segment(ax, ay, bx, by, px, py):
+        """Check if p, collinear with the segment ab, lies on it."""
+        return (min(ax, bx) <= px <= max(ax, bx) and
+                min(ay, by) <= py <= max(ay, by))
+
+    @njit(cache=True)
+    def _is_simple(vx, vy):
+        """Check that no two non-adjacent edges of the polygon cross or
+        touch each other."""
+        n = len(vx)
+        for i in range(n):
+            ax, ay = vx[i], vy[i]
+            bx, by = vx[(i + 1) % n], vy[(i + 1) % n]
+            for j in range(i + 2, n):
+                if i == 0 and j == n - 1:
+                    continue
+                cx, cy = vx[j], vy[j]
+                dx, dy = vx[(j + 1) % n], vy[(j + 1) % n]
+                o1 = _orientation(ax, ay, bx, by, cx, cy)
+                o2 = _orientation(ax, ay, bx, by, dx, dy)
+                o3 = _orientation(cx, cy, dx, dy, ax, ay)
+                o4 = _orientation(cx, cy, dx, dy, bx, by)
+                if o1 * o2 < 0 and o3 * o4 < 0:
+                    return False
+                # A vertex on the other edge (or overlapping collinear
+                # edges) doesn't leave a simple polygon either.
+                if ((o1 == 0 and _on_segment(ax, ay, bx, by, cx, cy)) or
+                        (o2 == 0 and _on_segment(ax, ay, bx, by, dx, dy)) or
+                        (o3 == 0 and _on_segment(cx, cy, dx, dy, ax, ay)) or
+                        (o4 == 0 and _on_segment(cx, cy, dx, dy, bx, by))):
+                    return False
+        return True
+
+    @njit(cache=True)
+    def _in_triangle(ax, ay, bx, by, cx, cy, px, py):
+        return (_orientation(ax, ay, bx, by, px, py) >= 0 and
+                _orientation(bx, by, cx, cy, px, py) >= 0 and
+                _orientation(cx, cy, ax, ay, px, py) >= 0)
+
+    @njit(cache=True)
+    def _turn(vx, vy, sign, a, b, c):
+        return _orientation(vx[a] * sign, vy[a], vx[b] * sign, vy[b],
+                            vx[c] * sign, vy[c])
+
+    @njit(cache=True)
+    def _is_ear(vx, vy, sign, reflex, n_reflex, a, b, c):
+        if _turn(vx, vy, sign, a, b, c) < 0:
+            return False
+
+        # Only reflex vertices can lie inside an ear.
+        ax, ay = vx[a] * sign, vy[a]
+        bx, by = vx[b] * sign, vy[b]
+        cx, cy = vx[c] * sign, vy[c]
+        for k in range(n_reflex):
+            p = reflex[k]
+            if p == a or p == b or p == c:
+                continue
+            if _in_triangle(ax, ay, bx, by, cx, cy, vx[p] * sign, vy[p]):
+                return False
+        return True
+
+    @njit(cache=True)
+    def _remove_reflex(reflex, reflex_pos, n_reflex, i):
+        """Remove vertex i from the reflex list, returns the new length."""
+        k = reflex_pos[i]
+        if k < 0:
+            return n_reflex
+        last = reflex[n_reflex - 1]
+        reflex[k] = last
+        reflex_pos[last] = k
+        reflex_pos[i] = -1
+        return n_reflex - 1
+
+    @njit(cache=True)
+    def _earcut(vx, vy):
+        n = len(vx)
+        faces = np.empty((n - 2, 3), np.uint32)
+        if not _is_simple(vx, vy):
+            return faces[:0]
+
+        # Mirror clockwise polygons along the x-axis so that every ear
+        # turns counter-clockwise.
+        area = 0.0
+        for i in range(n):
+            j = (i + 1) % n
+            area += vx[i] * vy[j] - vx[j] * vy[i]
+        sign = 1.0 if area > 0 else -1.0
+
+        # The remaining polygon is kept as a doubly linked list.
+        prev = np.empty(n, np.int64)
+        nxt = np.empty(n, np.int64)
+        for i in range(n):
+            prev[i] = (i + n - 1) % n
+            nxt[i] = (i + 1) % n
+
+        # Keep a list of the reflex (and collinear) vertices so that
+        # the ear tests don't have to scan the whole polygon. Clipping
+        # an ear can only turn its two neighbours convex.
+        reflex = np.empty(n, np.int64)
+        reflex_pos = np.full(n, -1, np.int64)
+        n_reflex = 0
+        for i in range(n):
+            if _turn(vx, vy, sign, prev[i], i, nxt[i]) <= 0:
+                reflex[n_reflex] = i
+                reflex_pos[i] = n_reflex
+                n_reflex += 1
+
+        count = 0
+        remaining = n
+        misses = 0
+        b = 0
+        while remaining > 3:
+            a = prev[b]
+            c = nxt[b]
+            if _is_ear(vx, vy, sign, reflex, n_reflex, a, b, c):
+                faces[count, 0] = a
+                faces[count, 1] = b
+                faces[count, 2] = c
+                count += 1
+
+                nxt[a] = c
+                prev[c] = a
+                remaining -= 1
+                misses = 0
+                n_reflex = _remove_reflex(reflex, reflex_pos, n_reflex, b)
+                if _turn(vx, vy, sign, prev[a], a, c) > 0:
+                    n_reflex = _remove_reflex(reflex, reflex_pos, n_reflex, a)
+                if _turn(vx, vy, sign, a, c, nxt[c]) > 0:
+                    n_reflex = _remove_reflex(reflex, reflex_pos, n_reflex, c)
+                b = c
+            else:
+                misses += 1
+                if misses > remaining:
+                    # Went all the way around without finding an ear.
+                    return faces[:count]
+                b = c
+
+        faces[count, 0] = prev[b]
+        faces[count, 1] = b
+        faces[count, 2] = nxt[b]
+        return faces[:count + 1]
@@ -189,7 +189,7 @@ def transform_shape(element):
 
 
 def parser(element):
-    shape = PShape([(0, 0)], children=[])
+    shape = PShape()
 
     transform = element.get('transform')
     transform_matrix = np.identity(4)
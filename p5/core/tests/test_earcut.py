@@ -0,0 +1,62 @@
+import math
+import unittest
+
+import numpy as np
+
+from p5.core import earcut as earcut_module
+from p5.core.earcut import earcut, vertex_turns
+
+
+def signed_area(vx, vy):
+    return 0.5 * (np.dot(vx, np.roll(vy, -1)) - np.dot(vy, np.roll(vx, -1)))
+
+
+@unittest.skipIf(earcut_module.njit is None, "requires numba")
+class TestEarcut(unittest.TestCase):
+    def assertTriangulates(self, vx, vy, n_triangles):
+        faces = earcut(vx, vy)
+        self.assertEqual(faces.shape, (n_triangles, 3))
+        area = sum(abs(signed_area(vx[f], vy[f])) for f in faces)
+        self.assertAlmostEqual(area, abs(signed_area(vx, vy)))
+
+    def test_concave(self):
+        vx = np.array([0.0, 10.0, 5.0, 10.0, 0.0])
+        vy = np.array([0.0, 0.0, 3.0, 10.0, 10.0])
+        self.assertTriangulates(vx, vy, 3)
+        # clockwise
+        self.assertTriangulates(vx[::-1].copy(), vy[::-1].copy(), 3)
+
+    def test_star(self):
+        angles = np.linspace(0, 2 * math.pi, 10, endpoint=False)
+        radii = np.tile([1.0, 0.4], 5)
+        self.assertTriangulates(radii * np.cos(angles),
+                                radii * np.sin(angles), 8)
+
+    def test_closing_vertex(self):
+        vx = np.array([0.0, 2.0, 1.0, 2.0, 0.0, 0.0])
+        vy = np.array([0.0, 0.0, 1.0, 2.0, 2.0, 0.0])
+        self.assertEqual(earcut(vx, vy).shape, (3, 3))
+
+    def test_self_intersecting(self):
+        angles = 4 * math.pi * np.arange(5) / 5
+        self.assertIsNone(earcut(np.cos(angles), np.sin(angles)))
+        # a vertex touching a non-adjacent edge
+        vx = np.array([0.5, 0.25, 0.0, -0.25, 0.75])
+        vy = np.array([-0.5, -0.25, -0.25, -0.5, 0.0])
+        self.assertIsNone(earcut(vx, vy))
+
+
+class TestVertexTurns(unittest.TestCase):
+    def test_vertex_turns(self):
+        vx = np.array([0.0, 2.0, 1.0, 2.0, 0.0])
+        vy = np.array([0.0, 0.0, 1.0, 2.0, 2.0])
+        turns = vertex_turns(vx, vy)
+        self.assertTrue(np.array_equal(np.sign(turns), [1, 1, -1, 1, 1]))
+        self.assertEqual(turns[2], -2.0)
+        # clockwise
+        self.assertTrue(np.all(vertex_turns(vx[::-1].copy(), vy[::-1].copy()) *
+                               turns[::-1] < 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+from p5.core import p5
+import builtins
+builtins.current_renderer = "vispy"
+p5.mode = 'P2D'
+from p5.sketch.Vispy2DRenderer import openglrenderer
+from p5.sketch.Vispy2DRenderer.renderer2d import VispyRenderer2D
+from p5.sketch.Vispy2DRenderer.shape import PShape
+from p5.core.color import Color
+
+
+class TestOpenGLRenderer(unittest.TestCase):
+    def setUp(self):
+        self._renderer = p5.renderer
+        self.renderer = p5.renderer = VispyRenderer2D()
+
+    def tearDown(self):
+        p5.renderer = self._renderer
+
+    def test_homogenize(self):
+        homogeneous = self.renderer._homogenize(np.full((3, 3), 2.0))
+        self.assertEqual(homogeneous.shape, (3, 4))
+        self.assertTrue(np.all(homogeneous[:, :3] == 2))
+        self.assertTrue(np.all(homogeneous[:, 3] == 1))
+
+        # reusing the buffer for fewer vertices
+        homogeneous = self.renderer._homogenize(np.full((2, 3), 5.0))
+        self.assertEqual(homogeneous.shape, (2, 4))
+        self.assertTrue(np.all(homogeneous[:, :3] == 5))
+        self.assertTrue(np.all(homogeneous[:, 3] == 1))
+
+        # growing the buffer
+        homogeneous = self.renderer._homogenize(np.zeros((10, 3)))
+        self.assertEqual(homogeneous.shape, (10, 4))
+        self.assertTrue(np.all(homogeneous[:, :3] == 0))
+        self.assertTrue(np.all(homogeneous[:, 3] == 1))
+
+    def test_auto_color(self):
+        a = PShape(vertices=[(0, 0), (1, 0), (1, 1)])
+        b = PShape(vertices=[(0, 0), (1, 0), (1, 1)])
+        self.assertEqual(a.fill, b.fill)
+
+        a.fill.red = 0
+        self.assertNotEqual(a.fill, b.fill)
+        self.assertEqual(b.fill.normalized, self.renderer.style.fill_color)
+        c = PShape(vertices=[(0, 0), (1, 0), (1, 1)])
+        self.assertEqual(c.fill.normalized, self.renderer.style.fill_color)
+
+    def test_render_without_colors(self):
+        vertices = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        self.renderer.render(PShape(vertices=vertices, fill_color=None))
+        self.renderer.render(PShape(vertices=vertices, stroke_color=None))
+        self.renderer.render(PShape(vertices=vertices, fill_color=Color(255),
+                                    stroke_color=Color(0)))
+
+        # (vertices, idx, color, ...) for every queued primitive
+        queue = self.renderer.draw_queue
+        self.assertEqual([stype for stype, _ in queue],
+                         ['lines', 'triangles', 'triangles', 'lines'])
+        for _, obj in queue:
+            self.assertIsNotNone(obj[2])
+
+    def test_render_2d_contours(self):
+        self.renderer.render(PShape(vertices=[(0, 0), (4, 0), (4, 4), (0, 4)],
+                                    contours=[[(1, 1), (3, 1), (3, 3)]],
+                                    fill_color=Color(255), stroke_color=Color(0)))
+        borders = [obj for stype, obj in self.renderer.draw_queue
+                   if stype == 'lines']
+        self.assertEqual(len(borders), 2)
+        self.assertEqual(borders[1][0].shape, (3, 3))
+
+
+@unittest.skipIf(openglrenderer.njit is None, "requires numba")
+class TestEdgeBuilders(unittest.TestCase):
+    # Only one of the two implementations runs in a given
+    # environment, so check that they agree.
+    def test_line_strip_edges(self):
+        for n_vert in (0, 1, 2, 5):
+            expected = openglrenderer._line_strip_edges_np(n_vert)
+            edges = openglrenderer._line_strip_edges(n_vert)
+            self.assertEqual(edges.dtype, expected.dtype)
+            self.assertTrue(np.array_equal(edges, expected))
+
+    def test_edge_loops(self):
+        for n_vert, k in ((0, 3), (3, 3), (9, 3), (8, 4)):
+            expected = openglrenderer._edge_loops_np(n_vert, k)
+            edges = openglrenderer._edge_loops(n_vert, k)
+            self.assertEqual(edges.dtype, expected.dtype)
+            self.assertTrue(np.array_equal(edges, expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,22 @@
+import math
 import unittest
 import numpy as np
 
-from p5.sketch.Vispy2DRenderer.shape import PShape
+from p5.sketch.Vispy2DRenderer.shape import PShape, _sanitize_vertex_list, _polygon_is_convex
+from p5.core.earcut import vertex_turns
+from p5.core import earcut as earcut_module
+from p5.sketch.Vispy2DRenderer.openglrenderer import _get_meshes, _get_borders, _tessellate_cached, \
+    _earcut_cached
 from p5.core.color import Color
+from p5.core.constants import SType
 from p5.pmath import PI
 
 vertices = [(0, 0), (1, 0), (1, 1), (0, 1)]
 
+# explicit style, so that the shapes don't need a renderer for 'auto'
+style = dict(fill_color=Color(255), stroke_color=Color(0), stroke_weight=2,
+             stroke_join=1, stroke_cap=1)
+
 quad = PShape(vertices=vertices, fill_color=Color(255),
               stroke_color=Color(0), stroke_weight=2,
               stroke_join=1, stroke_cap=1)
@@ -28,6 +38,13 @@ class TestPShape(unittest.TestCase):
         self.assertEqual(quad._stroke_cap, 1)
         self.assertEqual(quad._stroke_join, 1)
 
+    def test_colors(self):
+        shape = PShape(vertices=vertices, fill_color=None,
+                       stroke_color=(255, 0, 0), stroke_weight=2,
+                       stroke_join=1, stroke_cap=1)
+        self.assertIsNone(shape.fill)
+        self.assertEqual(shape.stroke, Color(255, 0, 0))
+
     def test_transforms(self):
         quad.translate(100, 100, 100)
         self.assertTrue(np.array_equal(
@@ -106,6 +123,151 @@ class TestPShape(unittest.TestCase):
             ])))
         quad.reset_matrix()
 
+    def test_sanitize_vertex_list(self):
+        sanitized = _sanitize_vertex_list([(0, 0), (1, 0), (1, 1)])
+        self.assertEqual(sanitized.shape, (3, 3))
+        self.assertTrue(sanitized.flags['C_CONTIGUOUS'])
+        self.assertTrue(np.array_equal(sanitized[:, 2], np.zeros(3)))
+
+        sanitized = _sanitize_vertex_list([(0, 0, 1), (1, 0, 2)])
+        self.assertTrue(np.array_equal(
+            sanitized, np.array([(0, 0, 1), (1, 0, 2)])))
+
+        self.assertEqual(_sanitize_vertex_list([]).shape, (0, 3))
+        with self.assertRaises(ValueError):
+            _sanitize_vertex_list([(0, 0, 0, 0)])
+
+    def test_draw_vertices(self):
+        shape = PShape(vertices=vertices, **style)
+        self.assertEqual(shape._get_draw_vertices().shape, (4, 3))
+        with shape.edit(reset=False):
+            shape.add_vertex((0.5, 2))
+        self.assertEqual(shape._get_draw_vertices().shape, (5, 3))
+
+    def test_polygon_is_convex(self):
+        def is_convex(poly):
+            vx, vy = np.array(poly, dtype=float).T.copy()
+            return _polygon_is_convex(vx, vy, vertex_turns(vx, vy))
+
+        self.assertTrue(is_convex(vertices))
+        # closing vertex and collinear vertices
+        self.assertTrue(is_convex(
+            [(0, 0), (1, 0), (2, 0), (2, 2), (0, 2), (0, 0)]))
+
+        self.assertFalse(is_convex([(0, 0), (2, 0), (1, 1), (2, 2), (0, 2)]))
+        # a collinear spike
+        self.assertFalse(is_convex(
+            [(2, 0), (2, 1), (0, 1), (1, 1), (1, 2), (1, 0)]))
+        # the reflex vertex is repeated
+        self.assertFalse(is_convex(
+            [(0, 0), (2, 0), (1, 1), (1, 1), (2, 2), (0, 2)]))
+        pentagram = [(math.cos(4 * PI * i / 5), math.sin(4 * PI * i / 5))
+                     for i in range(5)]
+        self.assertFalse(is_convex(pentagram))
+
+    def test_convex(self):
+        self.assertTrue(quad._is_convex())
+        tilted = PShape(vertices=[(0, 0, 0), (1, 0, 1), (1, 1, 0)], **style)
+        self.assertIs(tilted._is_convex(), False)
+
+    def test_shape_type(self):
+        shape = PShape(vertices=[(0, 0), (1, 0), (1, 1)], **style)
+        self.assertTrue(shape._is_tess)
+        self.assertEqual(shape._min_vertices, 0)
+        shape.shape_type = SType.QUADS
+        self.assertFalse(shape._is_tess)
+        self.assertEqual((shape._min_vertices, shape._vertex_multiple), (4, 4))
+
+    def test_from_batch(self):
+        batch = np.arange(24, dtype=float).reshape(4, 3, 2)
+        shapes = PShape.from_batch(batch, shape_type=SType.TRIANGLES, **style)
+        self.assertEqual(len(shapes), 4)
+        for shape, vertices in zip(shapes, batch):
+            self.assertEqual(shape.shape_type, SType.TRIANGLES)
+            self.assertEqual(len(shape.vertices), 3)
+            self.assertTrue(np.array_equal(shape._get_draw_vertices()[:, :2], vertices))
+            self.assertTrue(np.all(shape._get_draw_vertices()[:, 2] == 0))
+        self.assertTrue(np.shares_memory(shapes[0]._get_draw_vertices(),
+                                         shapes[1]._get_draw_vertices().base))
+
+        # shapes don't share their colors
+        shapes[0].fill.red = 0
+        self.assertEqual(shapes[1].fill, Color(255))
+
+        # nor the caller's array
+        batch = np.zeros((2, 3, 3))
+        shapes = PShape.from_batch(batch, **style)
+        self.assertFalse(np.shares_memory(shapes[0]._get_draw_vertices(), batch))
+        with shapes[0].edit(reset=False):
+            shapes[0].update_vertex(1, (1, 1, 0))
+        self.assertTrue(np.all(batch == 0))
+        self.assertTrue(np.array_equal(shapes[0]._get_draw_vertices()[1], [1, 1, 0]))
+        self.assertTrue(np.all(shapes[1]._get_draw_vertices() == 0))
+
+        with self.assertRaises(ValueError):
+            PShape.from_batch(batch[0], **style)
+
+    def test_update_vertex(self):
+        shape = PShape(vertices=[(0, 0), (2, 0), (2, 2), (1, 3), (0, 2)],
+                       **style)
+        meshes = _get_meshes(shape)
+
+        # Small edits that keep the shape convex keep the meshes
+        with shape.edit(reset=False):
+            shape.update_vertex(3, (1.1, 3.5))
+        self.assertIs(_get_meshes(shape), meshes)
+        self.assertTrue(np.array_equal(shape._get_draw_vertices()[3], [1.1, 3.5, 0]))
+
+        with shape.edit(reset=False):
+            shape.update_vertex(3, (1, 1))
+        self.assertIsNot(_get_meshes(shape), meshes)
+
+    def test_tessellate_cached(self):
+        _tessellate_cached.cache_clear()
+        frames = [PShape(vertices=[(0, 0, 0), (4, 0, 0), (4, 4, 0), (0, 4, 0)],
+                         contours=[[(1, 1, 0), (3, 1, 0), (3, 3, 0), (1, 3, 0)]],
+                         **style) for _ in range(2)]
+        meshes = [_get_meshes(frame) for frame in frames]
+
+        info = _tessellate_cached.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        for (_, first_vertices, _), (_, vertices, idx) in zip(*meshes):
+            self.assertIs(vertices, first_vertices)
+            self.assertFalse(vertices.flags.writeable)
+            self.assertFalse(idx.flags.writeable)
+
+    @unittest.skipIf(earcut_module.njit is None, "requires numba")
+    def test_earcut_cached(self):
+        _earcut_cached.cache_clear()
+        frames = [PShape(vertices=[(0, 0), (2, 0), (1, 1), (2, 2), (0, 2)],
+                         **style) for _ in range(2)]
+        meshes = [_get_meshes(frame) for frame in frames]
+
+        info = _earcut_cached.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        (first,), (second,) = meshes
+        self.assertEqual(second[0], 'triangles')
+        self.assertIs(second[2], first[2])
+        self.assertFalse(second[2].flags.writeable)
+
+    def test_borders(self):
+        shape = PShape(vertices=[(0, 0), (4, 0), (4, 4), (0, 4)], **style)
+        borders = _get_borders(shape)
+        self.assertEqual(len(borders), 1)
+        self.assertIs(_get_borders(shape), borders)
+
+        shape.contours = [[(1, 1), (3, 1), (3, 3)]]
+        borders = _get_borders(shape)
+        self.assertEqual(len(borders), 2)
+        self.assertIs(_get_borders(shape), borders)
+
+        shape.contours = []
+        shape.shape_type = SType.QUADS
+        borders = _get_borders(shape)
+        self.assertEqual(len(borders), 1)
+        self.assertTrue(np.array_equal(borders[0][2],
+                                       [[0, 1], [1, 2], [2, 3], [3, 0]]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -58,7 +58,7 @@ class VispySketch(app.Canvas):
     """
 
     def __init__(self, setup_method, draw_method,
-                 handlers=dict(), frame_rate=60):
+                 handlers=None, frame_rate=60):
         app.Canvas.__init__(
             self,
             title=builtins.title,
@@ -75,6 +75,8 @@ class VispySketch(app.Canvas):
         self.setup_done = False
         self.timer = app.Timer(1.0 / frame_rate, connect=self.on_timer)
 
+        if handlers is None:
+            handlers = {}
         self.handlers = dict()
         for handler_name in handler_names:
             self.handlers[handler_name] = handlers.get(handler_name, _dummy)
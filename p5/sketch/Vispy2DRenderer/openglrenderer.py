@@ -1,18 +1,33 @@
 from abc import ABC
+import functools
 import numpy as np
 
 from p5.core import p5
+from p5.core.color import Color
 from p5.core.constants import SType, ROUND, MITER
-from .shape import Arc
+from p5.core.earcut import earcut
+from .shape import _sanitize_vertex_list, _shallow_copy, _I4, DIRTY_MESHES, DIRTY_BORDERS
 
 from dataclasses import dataclass
 from vispy.gloo import Program, VertexBuffer, FrameBuffer, IndexBuffer
 from OpenGL.GLU import gluTessBeginPolygon, gluTessBeginContour, gluTessEndPolygon, gluTessEndContour, gluTessVertex
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain numpy
+    njit = None
+
 # Useful constants
 COLOR_WHITE = (1, 1, 1, 1)
 COLOR_BLACK = (0, 0, 0, 1)
 
+# Style attributes holding the current color (and whether it is
+# enabled) used for the 'auto' colors of a shape.
+_AUTO_COLOR_ATTRIBS = {
+    'stroke': ('stroke_color', 'stroke_enabled'),
+    'fill': ('fill_color', 'fill_enabled'),
+}
+
 
 def to_3x3(mat):
     """Returns the upper left 3x3 corner of an np.array
@@ -29,6 +44,52 @@ def _tess_new_contour(vertices):
     gluTessEndContour(p5.tess.tess)
 
 
+@functools.lru_cache(maxsize=256)
+def _tessellate_cached(vertices_bytes, contours_bytes):
+    """Tessellate a polygon given the raw bytes of its (n, 3) float64
+    vertices and of each of its contours.
+
+    Sketches tend to redraw the same polygons on every frame, so the
+    results are cached on the vertex data. The returned arrays are
+    shared between calls and hence marked read-only.
+
+    :returns: tuple of (gl_name, vertices, idx)
+    """
+    gluTessBeginPolygon(p5.tess.tess, None)
+    _tess_new_contour(np.frombuffer(vertices_bytes).reshape(-1, 3))
+    for contour_bytes in contours_bytes:
+        _tess_new_contour(np.frombuffer(contour_bytes).reshape(-1, 3))
+    gluTessEndPolygon(p5.tess.tess)
+
+    render_primitives = []
+    for gl_name, vertices, idx in p5.tess.get_result():
+        vertices = np.array(vertices, dtype=np.float64)
+        vertices.flags.writeable = False
+        idx.flags.writeable = False
+        render_primitives.append((gl_name, vertices, idx))
+    return tuple(render_primitives)
+
+
+@functools.lru_cache(maxsize=256)
+def _earcut_cached(vertices_bytes):
+    """Triangulate a polygon without contours given the raw bytes of its
+    (n, 3) float64 vertices, using the ear clipper.
+
+    Like `_tessellate_cached`, the results are cached on the vertex
+    data and marked read-only.
+
+    :returns: flat triangle indices, or None when the polygon can't be
+        triangulated this way.
+    """
+    vertices = np.frombuffer(vertices_bytes).reshape(-1, 3)
+    faces = earcut(np.ascontiguousarray(vertices[:, 0]),
+                   np.ascontiguousarray(vertices[:, 1]))
+    if faces is not None:
+        faces = faces.ravel()
+        faces.flags.writeable = False
+    return faces
+
+
 def _vertices_to_render_primitive(gl_name, vertices):
     """Returns a render primitive of gl_type with vertices in sequential order
     """
@@ -36,12 +97,62 @@ def _vertices_to_render_primitive(gl_name, vertices):
         len(vertices), dtype=np.uint32)]
 
 
+def _line_strip_edges_np(n_vert):
+    """Returns the (n_vert - 1, 2) edges chaining n_vert vertices sequentially
+    """
+    edges = np.empty((max(n_vert - 1, 0), 2), dtype=np.uint32)
+    edges[:, 0] = np.arange(len(edges), dtype=np.uint32)
+    np.add(edges[:, 0], 1, out=edges[:, 1])
+    return edges
+
+
+def _edge_loops_np(n_vert, k):
+    """Returns the (n_vert, 2) edges that close every group of k consecutive vertices into a loop
+    """
+    edges = np.empty((n_vert // k * k, 2), dtype=np.uint32)
+    edges[:, 0] = np.arange(len(edges), dtype=np.uint32)
+    np.add(edges[:, 0], 1, out=edges[:, 1])
+    edges[k - 1::k, 1] -= k  # close each loop
+    return edges
+
+
+if njit is None:
+    _line_strip_edges = _line_strip_edges_np
+    _edge_loops = _edge_loops_np
+else:
+    @njit(cache=True)
+    def _line_strip_edges(n_vert):
+        out = np.empty((max(n_vert - 1, 0), 2), np.uint32)
+        for i in range(n_vert - 1):
+            out[i, 0] = i
+            out[i, 1] = i + 1
+        return out
+
+    @njit(cache=True)
+    def _edge_loops(n_vert, k):
+        n_loop = n_vert // k
+        out = np.empty((n_loop * k, 2), np.uint32)
+        for j in range(n_loop):
+            for i in range(k):
+                out[j * k + i, 0] = j * k + i
+                out[j * k + i, 1] = j * k + (i + 1) % k
+        return out
+
+
+def _fan_indices(n_vert):
+    """Returns the indices of the n_vert - 2 triangles that fan out from the first vertex
+    """
+    faces = np.empty((max(n_vert - 2, 0), 3), dtype=np.uint32)
+    faces[:, 0] = 0
+    faces[:, 1] = np.arange(1, len(faces) + 1, dtype=np.uint32)
+    np.add(faces[:, 1], 1, out=faces[:, 2])
+    return faces.ravel()
+
+
 def _get_line_from_verts(vertices):
     """Given a list of vertices, chain them sequentially in a line rendering primitive
     """
-    n_vert = len(vertices)
-    return _get_line_from_indices(vertices, np.arange(
-        n_vert - 1, dtype=np.uint32), np.arange(1, n_vert, dtype=np.uint32))
+    return ['lines', np.asarray(vertices), _line_strip_edges(len(vertices))]
 
 
 def _get_line_from_indices(vertices, start, end):
@@ -56,10 +167,8 @@ def _get_line_from_indices(vertices, start, end):
     :param end: Array of end positions fo edges in vertex indices
     :type end: np.ndarray
     """
-    start = np.asarray(start, dtype=np.uint32)
-    end = np.asarray(end, dtype=np.uint32)
     return ['lines', np.asarray(vertices),
-            np.hstack((np.vstack(start), np.vstack(end)))]
+            np.stack((start, end), axis=1).astype(np.uint32, copy=False)]
 
 
 def _add_edges_to_primitive_list(primitive_list, vertices, start, end):
@@ -91,77 +200,99 @@ def _check_shape(shape):
     """Checks if the shape is valid using assertions
     """
     n_vert = len(shape.vertices)
-    if shape.shape_type in [SType.TRIANGLES,
-                            SType.TRIANGLE_FAN, SType.TRIANGLE_STRIP]:
-        assert n_vert >= 3, _not_enough_vertices(shape, 3)
-    elif shape.shape_type in [SType.LINES, SType.LINE_STRIP]:
-        assert n_vert >= 2, _not_enough_vertices(shape, 2)
-    elif shape.shape_type in [SType.QUADS, SType.QUAD_STRIP]:
-        assert n_vert >= 4, _not_enough_vertices(shape, 4)
-
-    if shape.shape_type == SType.TRIANGLES:
-        assert n_vert % 3 == 0, _wrong_multiple(shape, 3)
-    if shape.shape_type == SType.QUADS:
-        assert n_vert % 4 == 0, _wrong_multiple(shape, 4)
+    assert n_vert >= shape._min_vertices, _not_enough_vertices(
+        shape, shape._min_vertices)
+    assert n_vert % shape._vertex_multiple == 0, _wrong_multiple(
+        shape, shape._vertex_multiple)
 
 
 def _get_borders(shape):
+    """Returns the render primitives for the borders of a given shape
+
+    The borders are cached on the shape and only regenerated after its
+    vertices or contours change.
+
+    :returns: ['lines', vertices, idx]
+    """
+    if shape._dirty & DIRTY_BORDERS:
+        if shape._is_arc:
+            shape._borders = _generate_arc_borders(shape)
+        else:
+            shape._borders = _generate_borders(shape)
+        shape._dirty &= ~DIRTY_BORDERS
+    return shape._borders
+
+
+def _generate_borders(shape):
     """Generates the render primitives for the borders of a given shape
 
     :returns: ['lines', vertices, idx]
     """
     render_primitives = []
-    n_vert = len(shape.vertices)
+    vertices = shape._get_draw_vertices()
+    n_vert = len(vertices)
     if shape.shape_type == SType.TRIANGLES:
-        start = np.arange(n_vert)
-        end = np.arange(n_vert) + np.tile([1, 1, -2], n_vert // 3)
-        _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+        render_primitives.append(['lines', vertices, _edge_loops(n_vert, 3)])
     elif shape.shape_type == SType.TRIANGLE_STRIP:
-        start = np.concatenate((np.arange(n_vert - 1), np.arange(n_vert - 2)))
-        end = np.concatenate((np.arange(1, n_vert), np.arange(2, n_vert)))
+        start = np.concatenate((np.arange(n_vert - 1, dtype=np.uint32),
+                                np.arange(n_vert - 2, dtype=np.uint32)))
+        end = np.concatenate((np.arange(1, n_vert, dtype=np.uint32),
+                              np.arange(2, n_vert, dtype=np.uint32)))
         _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+            render_primitives, vertices, start, end)
     elif shape.shape_type == SType.TRIANGLE_FAN:
-        start = np.concatenate(
-            (np.repeat([0], n_vert - 1), np.arange(1, n_vert - 1)))
-        end = np.concatenate((np.arange(1, n_vert), np.arange(2, n_vert)))
+        start = np.concatenate((np.zeros(n_vert - 1, dtype=np.uint32),
+                                np.arange(1, n_vert - 1, dtype=np.uint32)))
+        end = np.concatenate((np.arange(1, n_vert, dtype=np.uint32),
+                              np.arange(2, n_vert, dtype=np.uint32)))
         _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+            render_primitives, vertices, start, end)
     elif shape.shape_type == SType.QUADS:
-        start = np.arange(n_vert)
-        end = np.arange(n_vert) + np.tile([1, 1, 1, -3], n_vert // 4)
-        _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+        render_primitives.append(['lines', vertices, _edge_loops(n_vert, 4)])
     elif shape.shape_type == SType.QUAD_STRIP:
-        start = np.concatenate(
-            (np.arange(
-                0, n_vert, 2), np.arange(
-                n_vert - 2)))
-        end = np.concatenate((np.arange(1, n_vert, 2), np.arange(2, n_vert)))
+        start = np.concatenate((np.arange(0, n_vert, 2, dtype=np.uint32),
+                                np.arange(n_vert - 2, dtype=np.uint32)))
+        end = np.concatenate((np.arange(1, n_vert, 2, dtype=np.uint32),
+                              np.arange(2, n_vert, dtype=np.uint32)))
         _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+            render_primitives, vertices, start, end)
     elif shape.shape_type == SType.LINES:
-        start = np.arange(0, n_vert, 2)
-        end = np.arange(1, n_vert, 2)
+        start = np.arange(0, n_vert, 2, dtype=np.uint32)
+        end = np.arange(1, n_vert, 2, dtype=np.uint32)
         _add_edges_to_primitive_list(
-            render_primitives, shape.vertices, start, end)
+            render_primitives, vertices, start, end)
     elif shape.shape_type == SType.LINE_STRIP:
-        render_primitives.append(_get_line_from_verts(shape.vertices))
+        render_primitives.append(_get_line_from_verts(vertices))
     elif shape.shape_type == SType.TESS:
-        render_primitives.append(_get_line_from_verts(shape.vertices))
+        render_primitives.append(_get_line_from_verts(vertices))
         for contour in shape.contours:
-            render_primitives.append(_get_line_from_verts(contour))
+            render_primitives.append(
+                _get_line_from_verts(_sanitize_vertex_list(contour)))
     return render_primitives
 
 
 def _get_meshes(shape):
+    """Returns the rendering primitives for the meshes of a given shape
+
+    The meshes are cached on the shape and only regenerated after its
+    vertices or contours change.
+
+    :returns: [shape_type, vertices, idx]
+    """
+    if shape._dirty & DIRTY_MESHES:
+        shape._meshes = _generate_meshes(shape)
+        shape._dirty &= ~DIRTY_MESHES
+    return shape._meshes
+
+
+def _generate_meshes(shape):
     """Generates the rendering primitives for the meshes of a given shape
 
     :returns: [shape_type, vertices, idx]
     """
     render_primitives = []
-    n_vert = len(shape.vertices)
+    vertices = shape._get_draw_vertices()
+    n_vert = len(vertices)
     if shape.shape_type in [
             SType.TRIANGLES, SType.TRIANGLE_STRIP, SType.TRIANGLE_FAN, SType.QUAD_STRIP]:
         gl_name = shape.shape_type.name.lower()
@@ -169,54 +300,68 @@ def _get_meshes(shape):
             gl_name = 'triangle_strip'  # but it can be drawn using triangle_strip
         render_primitives.append(
             _vertices_to_render_primitive(
-                gl_name, shape.vertices))
+                gl_name, vertices))
     elif shape.shape_type == SType.QUADS:
-        n_quad = len(shape.vertices) // 4
-        render_primitives.append(['triangles', np.asarray(shape.vertices),
+        n_quad = n_vert // 4
+        render_primitives.append(['triangles', vertices,
                                   np.repeat(np.arange(0, n_vert, 4, dtype=np.uint32), 6) +
                                   np.tile(np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32), n_quad)])
     elif shape.shape_type == SType.TESS:
-        gluTessBeginPolygon(p5.tess.tess, None)
-        _tess_new_contour(shape.vertices)
-        if len(shape.contours) > 0:
-            for contour in shape.contours:
-                _tess_new_contour(contour)
-        gluTessEndPolygon(p5.tess.tess)
-        render_primitives += p5.tess.get_result()
+        # planar polygon without holes
+        simple = len(shape.contours) == 0 and shape._is_planar()
+        if simple and shape._is_convex():
+            # Convex polygons don't need the tessellator, a triangle
+            # fan from the first vertex covers them.
+            render_primitives.append(['triangles', vertices, _fan_indices(n_vert)])
+            return render_primitives
+
+        vertices_bytes = vertices.tobytes()
+        if simple:
+            faces = _earcut_cached(vertices_bytes)
+            if faces is not None:
+                render_primitives.append(['triangles', vertices, faces])
+                return render_primitives
+
+        contours_bytes = tuple(_sanitize_vertex_list(contour).tobytes()
+                               for contour in shape.contours)
+        render_primitives.extend(
+            list(obj) for obj in _tessellate_cached(vertices_bytes, contours_bytes))
     return render_primitives
 
 
+def _generate_arc_borders(shape):
+    """Generates the render primitives for the borders of an arc
+
+    :returns: ['lines', vertices, idx]
+    """
+    if shape.arc_mode in ['CHORD', 'OPEN']:  # Implies shape.shape_type == TESS
+        return _generate_borders(shape)
+    elif shape.arc_mode is None:  # Implies shape.shape_type == TRIANGLE_FAN
+        return [_get_line_from_verts(shape._get_draw_vertices()[1:])]
+    elif shape.arc_mode == 'PIE':  # Implies shape.shape_type == TRIANGLE_FAN
+        return [_get_line_from_verts(shape._get_draw_vertices())]
+    return []
+
+
 def get_render_primitives(shape):
     """Given a shape, return a list of render primitives in the form of [type, vertices, indices]
     """
     _check_shape(shape)
     render_primitives = []
-    if isinstance(shape, Arc):
-        # Render meshes
-        if p5.renderer.style.fill_enabled:
-            render_primitives.extend(_get_meshes(shape))
-        # Render borders
-        if p5.renderer.style.stroke_enabled:
-            if shape.arc_mode in [
-                    'CHORD', 'OPEN']:  # Implies shape.shape_type == TESS
-                render_primitives.extend(_get_borders(shape))
-            elif shape.arc_mode is None:  # Implies shape.shape_type == TRIANGLE_FAN
-                render_primitives.append(
-                    _get_line_from_verts(shape.vertices[1:]))
-            elif shape.arc_mode == 'PIE':  # Implies shape.shape_type == TRIANGLE_FAN
-                render_primitives.append(_get_line_from_verts(shape.vertices))
-    else:
-        # Render points
-        if shape.shape_type == SType.POINTS:
-            render_primitives.append(
-                _vertices_to_render_primitive(
-                    render_primitives, 'points'))
-        # Render meshes
-        if p5.renderer.style.fill_enabled:
-            render_primitives.extend(_get_meshes(shape))
-        # Render borders
-        if p5.renderer.style.stroke_enabled:
-            render_primitives.extend(_get_borders(shape))
+    # Shapes without a fill (or stroke) color skip the primitives that
+    # would be drawn with it; points are drawn with the fill color.
+    has_fill = p5.renderer.style.fill_enabled and shape.fill is not None
+    has_stroke = p5.renderer.style.stroke_enabled and shape.stroke is not None
+    # Render points
+    if shape._is_points and has_fill:
+        render_primitives.append(
+            _vertices_to_render_primitive('points', shape._get_draw_vertices()))
+    # Render meshes
+    if has_fill:
+        render_primitives.extend(_get_meshes(shape))
+    # Render borders
+    if has_stroke:
+        render_primitives.extend(_get_borders(shape))
     return render_primitives
 
 
@@ -245,9 +390,14 @@ class OpenGLRenderer(ABC):
         self.vertex_buffer = None
         self.index_buffer = None
 
+        # Scratch buffer for homogeneous vertex coordinates, see
+        # `_homogenize`.
+        self._homogeneous_buffer = np.ones((0, 4))
+
         # Renderer Globals: STYLE/MATERIAL PROPERTIES
         #
         self.style = Style()
+        self._auto_colors = {}
 
         # Renderer Globals: Curves
         self.stroke_weight = 1
@@ -304,8 +454,9 @@ class OpenGLRenderer(ABC):
             num_vertices = num_vertices + len(vertices)
 
         # 2. Create empty buffers based on the number of vertices.
+        # (every row gets filled in below)
         #
-        data = np.zeros(num_vertices,
+        data = np.empty(num_vertices,
                         dtype=[('position', np.float32, 3),
                                ('color', np.float32, 4)])
 
@@ -317,11 +468,10 @@ class OpenGLRenderer(ABC):
         for vertices, idx, color in draw_queue:
             num_shape_verts = len(vertices)
 
-            data['position'][sidx:(sidx + num_shape_verts),
-                             ] = np.array(vertices)
-
-            color_array = np.array([color] * num_shape_verts)
-            data['color'][sidx:sidx + num_shape_verts, :] = color_array
+            # Cast straight into the float32 buffer, without an
+            # intermediate copy of the vertices or the colors.
+            data['position'][sidx:(sidx + num_shape_verts), ] = vertices
+            data['color'][sidx:sidx + num_shape_verts, :] = color
 
             draw_indices.append(sidx + idx)
 
@@ -350,5 +500,46 @@ class OpenGLRenderer(ABC):
         self.fbuffer_prog.delete()
         self.fbuffer.delete()
 
+    def auto_color(self, name):
+        """Returns the current style color for a shape attribute.
+
+        The color is only parsed again when the style color changes,
+        every shape gets its own (shallow) copy of it since Color
+        objects are mutable.
+
+        :param name: shape attribute, one of {'fill', 'stroke'}
+        :type name: str
+
+        :returns: The current color or None when it is disabled.
+        :rtype: Color | None
+        """
+        color_attrib, enabled_attrib = _AUTO_COLOR_ATTRIBS[name]
+        if not getattr(self.style, enabled_attrib):
+            return None
+
+        value = getattr(self.style, color_attrib)
+        cached_value, color = self._auto_colors.get(name, (None, None))
+        if color is None or cached_value != value:
+            color = Color(*value, color_mode='RGBA', normed=True)
+            self._auto_colors[name] = (value, color)
+        return _shallow_copy(color)
+
+    def _homogenize(self, vertices):
+        """Returns the homogeneous coordinates of the given (n, 3) vertices.
+
+        The result is a view into a buffer that is reused across calls
+        (and only reallocated when it is too small), so it is only
+        valid until the next call.
+        """
+        n_vert = len(vertices)
+        if n_vert > len(self._homogeneous_buffer):
+            self._homogeneous_buffer = np.ones(
+                (max(2 * len(self._homogeneous_buffer), n_vert), 4))
+        homogeneous = self._homogeneous_buffer[:n_vert]
+        homogeneous[:, :3] = vertices
+        return homogeneous
+
     def _transform_vertices(self, vertices, local_matrix, global_matrix):
-        return np.dot(np.dot(vertices, local_matrix.T), global_matrix.T)[:, :3]
+        if local_matrix is not _I4:  # skip untransformed shapes
+            vertices = np.dot(vertices, local_matrix.T)
+        return np.dot(vertices, global_matrix.T)[:, :3]
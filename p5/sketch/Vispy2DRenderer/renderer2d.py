@@ -167,7 +167,7 @@ class VispyRenderer2D(OpenGLRenderer):
             stype, vertices, idx = obj
             # Transform vertices
             vertices = self._transform_vertices(
-                np.hstack([vertices, np.ones((len(vertices), 1))]),
+                self._homogenize(vertices),
                 shape._matrix,
                 self.transform_matrix)
             # Add to draw queue
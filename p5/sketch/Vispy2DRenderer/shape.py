@@ -25,6 +25,7 @@ import numpy as np
 import math
 
 from p5.core.color import Color
+from p5.core.earcut import vertex_turns
 from p5.core.constants import SType
 from p5.pmath import matrix
 from p5.pmath.vector import Point
@@ -33,6 +34,31 @@ from p5.core import p5
 
 __all__ = ['PShape']
 
+# Flags for the cached draw data of a shape that needs to be
+# regenerated before it is drawn again (see `PShape._dirty`).
+DIRTY_VERTICES = 1
+DIRTY_MESHES = 2
+DIRTY_BORDERS = 4
+DIRTY_ALL = DIRTY_VERTICES | DIRTY_MESHES | DIRTY_BORDERS
+
+# Identity matrix shared by all untransformed shapes. The transform
+# methods always replace the shape matrices instead of writing to
+# them, so this never needs to be copied.
+_I4 = np.identity(4)
+_I4.flags.writeable = False
+
+# (minimum number of vertices, required multiple of the number of
+# vertices) for each shape type.
+_VERTEX_COUNT_RULES = {
+    SType.LINES: (2, 1),
+    SType.LINE_STRIP: (2, 1),
+    SType.TRIANGLES: (3, 3),
+    SType.TRIANGLE_FAN: (3, 1),
+    SType.TRIANGLE_STRIP: (3, 1),
+    SType.QUADS: (4, 4),
+    SType.QUAD_STRIP: (4, 1),
+}
+
 
 def _ensure_editable(func):
     """A decorater that ensures that a shape is in 'edit' mode.
@@ -77,6 +103,129 @@ def _call_on_children(func):
     return rfunc
 
 
+def _sanitize_vertex_list(vertices, tdim=3, sdim=2):
+    """Convert a list of vertices to a C-contiguous (n, tdim) array.
+
+    Vertices with fewer than `tdim` (but at least `sdim`) components
+    are padded with zeros.
+
+    :param vertices: List of vertices to be converted.
+    :type vertices: list | np.ndarray
+
+    :param tdim: Number of components in the returned vertices
+        (default: 3)
+    :type tdim: int
+
+    :param sdim: Minimum number of components expected in the input
+        vertices (default: 2)
+    :type sdim: int
+
+    :returns: The vertices as an array of shape (n, tdim)
+    :rtype: np.ndarray
+
+    :raises ValueError: if the vertices have an unexpected number of
+        components.
+
+    """
+    try:
+        arr = np.asarray(vertices, dtype=np.float64)
+    except ValueError:
+        # Vertices with a mix of 2 and 3 components (for instance,
+        # 2D vertices extended using `add_vertex`) need to be padded
+        # individually.
+        arr = np.array([list(v) + [0] * (tdim - len(v)) for v in vertices],
+                       dtype=np.float64)
+
+    if arr.size == 0:
+        return np.zeros((0, tdim))
+
+    k = arr.shape[-1]
+    if arr.ndim != 2 or not (min(tdim, sdim) <= k <= max(tdim, sdim)):
+        raise ValueError("Expected vertices with {} to {} components".format(
+            min(tdim, sdim), max(tdim, sdim)))
+
+    if k >= tdim:
+        return np.ascontiguousarray(arr[:, :tdim])
+
+    padded = np.empty((arr.shape[0], tdim))
+    padded[:, :k] = arr
+    padded[:, k:] = 0
+    return padded
+
+
+def _polygon_is_convex(vx, vy, turns):
+    """Check if a polygon is convex.
+
+    Repeated consecutive vertices (like the closing vertex of a shape
+    drawn with `CLOSE`) and collinear vertices are allowed.
+
+    :param vx: x-coordinates of the polygon vertices
+    :type vx: np.ndarray
+
+    :param vy: y-coordinates of the polygon vertices
+    :type vy: np.ndarray
+
+    :param turns: the turns of the polygon, `vertex_turns(vx, vy)`
+    :type turns: np.ndarray
+
+    :rtype: bool
+    """
+    if np.any(turns == 0):
+        # The turn at a corner with a repeated vertex is hidden by the
+        # zero-length edge between the copies, so drop them.
+        keep = (vx != np.roll(vx, 1)) | (vy != np.roll(vy, 1))
+        if np.count_nonzero(keep) < len(vx):
+            vx, vy = vx[keep], vy[keep]
+            turns = vertex_turns(vx, vy)
+    if len(vx) < 3:
+        return False
+
+    ex = np.diff(vx, append=vx[:1])
+    ey = np.diff(vy, append=vy[:1])
+
+    turns = np.sign(turns)
+    straight = turns == 0
+    if np.any(straight):
+        # The polygon has to go straight on at a collinear vertex, not
+        # turn back on itself (like a spike).
+        dots = ex * np.roll(ex, 1) + ey * np.roll(ey, 1)
+        if np.any(dots[straight] <= 0):
+            return False
+    turns = turns[~straight]
+    if len(turns) == 0 or np.any(turns != turns[0]):
+        return False
+
+    # Turning the same way at every vertex isn't enough, a pentagram
+    # does that too. The edges of a convex polygon change direction
+    # at most twice along each axis.
+    for directions in (np.sign(ex), np.sign(ey)):
+        directions = directions[directions != 0]
+        if np.count_nonzero(directions != np.roll(directions, 1)) > 2:
+            return False
+    return True
+
+
+def _shallow_copy(obj):
+    """Shallow copy of a plain (__dict__ based) object, a faster
+    stand-in for `copy.copy` when making many copies.
+    """
+    if obj is None:
+        return None
+    clone = object.__new__(type(obj))
+    clone.__dict__.update(obj.__dict__)
+    return clone
+
+
+def _vertex_turn(vx, vy, i):
+    """Returns the cross product of the two polygon edges meeting at
+    vertex i. The sign gives the direction the polygon turns in.
+    """
+    a = (i - 1) % len(vx)
+    c = (i + 1) % len(vx)
+    return ((vx[i] - vx[a]) * (vy[c] - vy[i]) -
+            (vy[i] - vy[a]) * (vx[c] - vx[i]))
+
+
 class PShape:
     """Custom shape class for p5.
 
@@ -100,6 +249,8 @@ class PShape:
 
     """
 
+    _is_arc = False
+
     def __init__(self, fill_color='auto',
                  stroke_color='auto', stroke_weight="auto",
                  stroke_join="auto", stroke_cap="auto",
@@ -112,10 +263,18 @@ class PShape:
         self._stroke_cap = None
         self._stroke_join = None
 
-        self._matrix = np.identity(4)
-        self._transform_matrix = np.identity(4)
+        self._matrix = _I4
+        self._transform_matrix = _I4
         self._transformed_draw_vertices = None
 
+        # cached draw data, kept until the corresponding `_dirty` flag
+        # gets set.
+        self._vertex_array = None
+        self._meshes = None
+        self._borders = None
+        self._convex = None
+        self._dirty = DIRTY_ALL
+
         # a flag to check if the shape is being edited right now.
         self._in_edit_mode = False
 
@@ -128,27 +287,158 @@ class PShape:
         self.children = children or []
         self.visible = visible
 
-        self.vertices = list(vertices)
+        self.vertices = vertices
         self.shape_type = shape_type
-        self.contours = [list(c) for c in contours]  # List of all contours
+        self.contours = contours  # List of all contours
+
+    @classmethod
+    def from_batch(cls, vertices_batch, **kwargs):
+        """Create a shape for every vertex list in a batch.
+
+        The vertices of all the shapes are converted together and the
+        draw vertices of each shape are views into one shared copy of
+        them. The style arguments are only resolved once (for a
+        template shape that the others are copied from), which makes
+        this cheaper than building many small shapes (like the
+        particles of a particle system) one at a time.
+
+        :param vertices_batch: vertices of N shapes with V vertices each
+        :type vertices_batch: (N, V, 2) or (N, V, 3) array-like
+
+        :param kwargs: keyword arguments for every shape (fill_color,
+            shape_type, etc.)
+
+        :returns: list of the N shapes
+        :rtype: list
+        """
+        batch = np.asarray(vertices_batch, dtype=np.float64)
+        if batch.ndim != 3:
+            raise ValueError(
+                "vertices_batch should have shape (N, V, 2) or (N, V, 3)")
+        n_shape, n_vert, n_dim = batch.shape
+
+        pool = _sanitize_vertex_list(batch.reshape(-1, n_dim))
+        if np.may_share_memory(pool, batch):
+            # don't draw (or edit) the caller's array
+            pool = pool.copy()
+        pool_x = np.ascontiguousarray(pool[:, 0])
+        pool_y = np.ascontiguousarray(pool[:, 1])
+        pool_vertices = pool.tolist()
+
+        template = cls(**kwargs)
+        shapes = []
+        for i in range(n_shape):
+            lo, hi = i * n_vert, (i + 1) * n_vert
+            shape = _shallow_copy(template)
+            # The mutable attributes of the template can't be shared.
+            shape._fill = _shallow_copy(template._fill)
+            shape._stroke = _shallow_copy(template._stroke)
+            shape.children = list(template.children)
+            shape._contours = [list(c) for c in template._contours]
+
+            shape._vertices = pool_vertices[lo:hi]
+            shape._vertex_array = pool[lo:hi]
+            shape._vx = pool_x[lo:hi]
+            shape._vy = pool_y[lo:hi]
+            shape._turns = None
+            shape._dirty = DIRTY_ALL & ~DIRTY_VERTICES
+            shapes.append(shape)
+        return shapes
+
+    @property
+    def vertices(self):
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, new_vertices):
+        self._vertices = list(new_vertices)
+        self._dirty = DIRTY_ALL
+
+    @property
+    def contours(self):
+        return self._contours
+
+    @contours.setter
+    def contours(self, new_contours):
+        self._contours = [list(c) for c in new_contours]
+        self._dirty |= DIRTY_MESHES | DIRTY_BORDERS
+
+    @property
+    def shape_type(self):
+        return self._shape_type
+
+    @shape_type.setter
+    def shape_type(self, new_shape_type):
+        self._shape_type = new_shape_type
+        # Answer the renderer's per-draw questions about the shape type
+        # once, here.
+        self._is_tess = new_shape_type == SType.TESS
+        self._is_points = new_shape_type == SType.POINTS
+        self._min_vertices, self._vertex_multiple = _VERTEX_COUNT_RULES.get(
+            new_shape_type, (0, 1))
+        self._dirty |= DIRTY_MESHES | DIRTY_BORDERS
+
+    def _get_draw_vertices(self):
+        """Returns the shape vertices as an (n, 3) array, converted only
+        once for every change to the vertex list.
+
+        This (and the other per-draw checks below) are plain methods
+        rather than properties, they are called for every shape on
+        every frame.
+        """
+        if self._dirty & DIRTY_VERTICES:
+            if len(self._vertices) == 0:
+                self._vertex_array = np.zeros((0, 3))
+            else:
+                self._vertex_array = _sanitize_vertex_list(self._vertices)
+            # Per-axis copies for the scans (like the convexity
+            # check) that only need the x or y coordinates.
+            self._vx = np.ascontiguousarray(self._vertex_array[:, 0])
+            self._vy = np.ascontiguousarray(self._vertex_array[:, 1])
+            self._turns = None
+            self._convex = None
+            self._dirty &= ~DIRTY_VERTICES
+        return self._vertex_array
+
+    def _is_planar(self):
+        """Whether the shape is a polygon lying in a plane parallel to the
+        xy-plane.
+        """
+        vertices = self._get_draw_vertices()
+        return len(vertices) >= 3 and np.ptp(vertices[:, 2]) == 0
+
+    def _is_convex(self):
+        """Whether the shape is a convex polygon lying in a plane parallel
+        to the xy-plane. The result is cached until the vertices change.
+        """
+        if self._dirty & DIRTY_VERTICES or self._convex is None:
+            # (updating the vertex array resets the cached result)
+            self._get_draw_vertices()
+            self._convex = False
+            self._turns = None
+            if self._is_planar():
+                turns = vertex_turns(self._vx, self._vy)
+                if _polygon_is_convex(self._vx, self._vy, turns):
+                    self._convex = True
+                    # Remember the turn direction at every vertex, this
+                    # lets `update_vertex` keep the triangulation of
+                    # small edits.
+                    self._turns = np.sign(turns)
+        return self._convex
 
     def _set_color(self, name, value=None):
         color = None
 
         if isinstance(value, Color):  # Is Color, no need to parse
             color = value
-        else:  # Not Color, attempt to parse it
-            if name == 'stroke' and p5.renderer.style.stroke_enabled:
-                color = Color(*p5.renderer.style.stroke_color,
-                              color_mode='RGBA', normed=True)
-            if name == 'fill' and p5.renderer.style.fill_enabled:
-                color = Color(*p5.renderer.style.fill_color,
-                              color_mode='RGBA', normed=True)
-
-        if name == 'stroke':
-            self._stroke = color
-        elif name == 'fill':
-            self._fill = color
+        elif isinstance(value, str) and value == 'auto':
+            color = p5.renderer.auto_color(name)
+        elif isinstance(value, (tuple, list)):  # Not Color, attempt to parse it
+            color = Color(*value)
+        elif value is not None:
+            color = Color(value)
+
+        setattr(self, '_' + name, color)
 
     @property
     def fill(self):
@@ -230,6 +520,7 @@ class PShape:
         :type vertex: tuple | list | p5.Vector | np.ndarray
         """
         self.vertices.append(Point(*vertex))
+        self._dirty = DIRTY_ALL
 
     @_ensure_editable
     def update_vertex(self, idx, vertex):
@@ -242,6 +533,57 @@ class PShape:
         :type vertex: tuple | list | p5.Vector | np.ndarray
         """
         self.vertices[idx] = Point(*vertex)
+        if not self._move_vertex(idx):
+            self._dirty = DIRTY_ALL
+
+    def _move_vertex(self, idx):
+        """Move a vertex in the cached vertex array, keeping the meshes
+        and borders (which refer to the same array).
+
+        The meshes of most shape types only depend on the order of the
+        vertices. The triangle fan used for a (strictly) convex TESS
+        shape only stays valid as long as the shape stays convex; for
+        all other TESS shapes the meshes need to be regenerated.
+
+        :returns: whether the vertex could be moved.
+        :rtype: bool
+        """
+        if self._dirty & DIRTY_VERTICES:
+            return False
+
+        n_vert = len(self._vertex_array)
+        idx = idx % n_vert
+        vertex = _sanitize_vertex_list([self._vertices[idx]])[0]
+
+        if self._is_tess:
+            if (self._turns is None or len(self.contours) > 0 or
+                    idx == 0 or n_vert < 4 or np.any(self._turns == 0) or
+                    vertex[2] != self._vertex_array[0, 2]):
+                return False
+
+            old_x, old_y = self._vx[idx], self._vy[idx]
+            self._vx[idx], self._vy[idx] = vertex[0], vertex[1]
+
+            # The turns at the moved vertex and its neighbours and the
+            # orientation of the two fan triangles (from vertex 0)
+            # containing it shouldn't change.
+            turns = np.sign([_vertex_turn(self._vx, self._vy, i)
+                             for i in (idx - 1, idx, (idx + 1) % n_vert)])
+            fan = np.sign([_vertex_turn(self._vx[[0, j, j + 1]],
+                                        self._vy[[0, j, j + 1]], 1)
+                           for j in (idx - 1, idx) if 1 <= j < n_vert - 1])
+            if np.any(turns != self._turns[0]) or np.any(fan != self._turns[0]):
+                self._vx[idx], self._vy[idx] = old_x, old_y
+                return False
+
+            for i, turn in zip((idx - 1, idx, (idx + 1) % n_vert), turns):
+                self._turns[i] = turn
+        else:
+            self._vx[idx], self._vy[idx] = vertex[0], vertex[1]
+
+        self._vertex_array[idx] = vertex
+        self._convex = None
+        return True
 
     def add_child(self, child):
         """Add a child shape to the current shape
@@ -281,7 +623,7 @@ class PShape:
         """Reset the transformation matrix associated with the shape.
 
         """
-        self._matrix = np.identity(4)
+        self._matrix = _I4
 
     @_call_on_children
     @_apply_transform
@@ -453,6 +795,8 @@ POINT_ACCURACY_FACTOR = 10
 
 
 class Arc(PShape):
+    _is_arc = True
+
     def __init__(self, center, radii, start_angle, stop_angle,
                  mode=None, fill_color='auto',
                  stroke_color='auto', stroke_weight="auto",
@@ -245,11 +245,10 @@ class Renderer3D(OpenGLRenderer):
 
     def render(self, shape):
         if isinstance(shape, Geometry):
-            n = len(shape.vertices)
             # Perform model transform
             # TODO: Investigate moving model transform from CPU to the GPU
             tverts = self._transform_vertices(
-                np.hstack([shape.vertices, np.ones((n, 1))]),
+                self._homogenize(shape.vertices),
                 shape.matrix,
                 self.transform_matrix)
             tnormals = self.tnormals(shape)
@@ -276,7 +275,7 @@ class Renderer3D(OpenGLRenderer):
                 stype, vertices, idx = obj
                 # Transform vertices
                 vertices = self._transform_vertices(
-                    np.hstack([vertices, np.ones((len(vertices), 1))]),
+                    self._homogenize(vertices),
                     shape._matrix,
                     self.transform_matrix)
                 # Add to draw queue
@@ -353,7 +352,7 @@ class Renderer3D(OpenGLRenderer):
 
         # 2. Create empty buffers based on the number of vertices.
         #
-        data = np.zeros(num_vertices,
+        data = np.empty(num_vertices,
                         dtype=[('position', np.float32, 3),
                                ('normal', np.float32, 3)])
 
@@ -361,9 +360,9 @@ class Renderer3D(OpenGLRenderer):
         # it's information to the buffer.
         #
         draw_indices = []
-        data['position'][0:num_vertices, ] = np.array(vertices)
+        data['position'][0:num_vertices, ] = vertices
         draw_indices.append(idx)
-        data['normal'][0:num_vertices, ] = np.array(normals)
+        data['normal'][0:num_vertices, ] = normals
         self.vertex_buffer.set_data(data)
         self.index_buffer.set_data(np.hstack(draw_indices))
 
@@ -425,7 +424,7 @@ class Renderer3D(OpenGLRenderer):
                         Z_EPSILON).dot(
                         self.lookat_matrix))
                 vertices = current_obj[0]
-                current_obj = (np.hstack([vertices, np.ones((vertices.shape[0], 1))]).dot(line_transform.T)[:, :3],
+                current_obj = (self._homogenize(vertices).dot(line_transform.T)[:, :3],
                                *current_obj[1:])
             self.render_with_shaders(current_shape, current_obj)
 
@@ -38,6 +38,11 @@ setup(
 
     setup_requires=['numpy'],
     install_requires=requires,
+    extras_require={
+        # compiled kernels for the edge builders and the ear clipping
+        # triangulation; without it p5 falls back to numpy and GLU.
+        'numba': ['numba>=0.50'],
+    },
     python_requires='>=3.6',
 
     classifiers=[